@@ -6,13 +6,19 @@ WordPress.org requires using wp_date() or gmdate() instead of date()
 for timezone safety and i18n support.
 
 Usage:
-    python3 fix-date-calls.py [--dry-run]
+    python3 fix-date-calls.py [--dry-run] [--yes] [--report=phpcs-report.json]
+
+With --report, only files and lines flagged by phpcs as
+WordPress.DateTime.RestrictedFunctions.date_date are touched
+(see phpcs_report.py).
 """
 
 import re
 import sys
 import os
 
+from phpcs_report import apply_line_fixes, get_report_arg, load_report
+
 # Files to process
 FILES_TO_FIX = [
     'msh-image-optimizer/admin/image-optimizer-admin.php',
@@ -24,68 +30,80 @@ FILES_TO_FIX = [
     'msh-image-optimizer/includes/class-msh-image-optimizer.php',
 ]
 
-def fix_date_calls(content):
-    """
-    Replace date() calls with WordPress-safe alternatives.
-
-    Strategy:
-    - date('Y-m') → wp_date('Y-m') (user-facing, needs timezone)
-    - date('Y-m-d H:i:s') → current_time('mysql') (WordPress standard)
-    - date('Y-m-d') in filenames → gmdate('Y-m-d') (UTC, no timezone issues)
-    - date('H:i:s.') → gmdate('H:i:s.') (logging timestamps)
-    """
-    replacements = 0
+# phpcs sniff for date() calls (for --report mode)
+SNIFF_DATE = 'WordPress.DateTime.RestrictedFunctions.date_date'
 
+# (pattern, replacement, label), applied in order
+DATE_FIXES = [
     # Fix 1: date('Y-m') for credit tracking → wp_date('Y-m')
     # User-facing month keys should respect site timezone
-    pattern = r"\bdate\(\s*['\"]Y-m['\"]\s*\)"
-    replacement = r"wp_date('Y-m')"
-    content, n = re.subn(pattern, replacement, content)
-    replacements += n
-    if n > 0:
-        print(f"  ✓ Fixed {n} date('Y-m') → wp_date('Y-m')")
+    (r"\bdate\(\s*['\"]Y-m['\"]\s*\)",
+     r"wp_date('Y-m')",
+     "date('Y-m') → wp_date('Y-m')"),
 
     # Fix 2a: date('Y-m-d H:i:s', strtotime('-X days')) → gmdate('Y-m-d H:i:s', strtotime('-X days'))
     # Relative date calculations for database queries - use gmdate for UTC
-    pattern = r"\bdate\(\s*['\"]Y-m-d H:i:s['\"]\s*,\s*strtotime\("
-    replacement = r"gmdate('Y-m-d H:i:s', strtotime("
-    content, n = re.subn(pattern, replacement, content)
-    replacements += n
-    if n > 0:
-        print(f"  ✓ Fixed {n} date('Y-m-d H:i:s', strtotime(...)) → gmdate('Y-m-d H:i:s', strtotime(...))")
+    (r"\bdate\(\s*['\"]Y-m-d H:i:s['\"]\s*,\s*strtotime\(",
+     r"gmdate('Y-m-d H:i:s', strtotime(",
+     "date('Y-m-d H:i:s', strtotime(...)) → gmdate('Y-m-d H:i:s', strtotime(...))"),
 
     # Fix 2b: date('Y-m-d H:i:s') for database timestamps → current_time('mysql')
     # WordPress standard for MySQL-formatted timestamps
-    pattern = r"\bdate\(\s*['\"]Y-m-d H:i:s['\"]\s*(?:,\s*\$timestamp)?\s*\)"
-    replacement = r"current_time('mysql')"
-    content, n = re.subn(pattern, replacement, content)
-    replacements += n
-    if n > 0:
-        print(f"  ✓ Fixed {n} date('Y-m-d H:i:s') → current_time('mysql')")
+    (r"\bdate\(\s*['\"]Y-m-d H:i:s['\"]\s*(?:,\s*\$timestamp)?\s*\)",
+     r"current_time('mysql')",
+     "date('Y-m-d H:i:s') → current_time('mysql')"),
 
     # Fix 3: date('Y-m-d') in filenames/logging → gmdate('Y-m-d')
     # UTC dates for internal use (filenames, logs) - no timezone conversion needed
-    pattern = r"\bdate\(\s*['\"]Y-m-d['\"]\s*\)"
-    replacement = r"gmdate('Y-m-d')"
-    content, n = re.subn(pattern, replacement, content)
-    replacements += n
-    if n > 0:
-        print(f"  ✓ Fixed {n} date('Y-m-d') → gmdate('Y-m-d')")
+    (r"\bdate\(\s*['\"]Y-m-d['\"]\s*\)",
+     r"gmdate('Y-m-d')",
+     "date('Y-m-d') → gmdate('Y-m-d')"),
 
     # Fix 4: date('H:i:s.') for log timestamps → gmdate('H:i:s.')
     # UTC timestamps for internal logging
-    pattern = r"\bdate\(\s*['\"]H:i:s\.\s*['\"]\s*\)"
-    replacement = r"gmdate('H:i:s.')"
-    content, n = re.subn(pattern, replacement, content)
-    replacements += n
-    if n > 0:
-        print(f"  ✓ Fixed {n} date('H:i:s.') → gmdate('H:i:s.')")
+    (r"\bdate\(\s*['\"]H:i:s\.\s*['\"]\s*\)",
+     r"gmdate('H:i:s.')",
+     "date('H:i:s.') → gmdate('H:i:s.')"),
+]
+
+def fix_date_calls(content, violations=None):
+    """
+    Replace date() calls with WordPress-safe alternatives.
+
+    Strategy:
+    - date('Y-m') → wp_date('Y-m') (user-facing, needs timezone)
+    - date('Y-m-d H:i:s') → current_time('mysql') (WordPress standard)
+    - date('Y-m-d') in filenames → gmdate('Y-m-d') (UTC, no timezone issues)
+    - date('H:i:s.') → gmdate('H:i:s.') (logging timestamps)
 
-    return content, replacements
+    If violations ({line: [(column, sniff_source)]}) from a phpcs report is
+    given, only the reported date() calls are rewritten.
+
+    Returns (content, replacements, unfixed) - unfixed lists the reported
+    (line, column, source) locations no pattern covers (always empty
+    without a report).
+    """
+    if violations is not None:
+        fixes = [(SNIFF_DATE, pattern, replacement) for pattern, replacement, _ in DATE_FIXES]
+        content, replacements, unfixed = apply_line_fixes(content, violations, fixes)
+        if replacements > 0:
+            print(f"  ✓ Fixed {replacements} reported date() calls")
+        return content, replacements, unfixed
+
+    replacements = 0
+
+    for pattern, replacement, label in DATE_FIXES:
+        content, n = re.subn(pattern, replacement, content)
+        replacements += n
+        if n > 0:
+            print(f"  ✓ Fixed {n} {label}")
+
+    return content, replacements, []
 
 def main():
     dry_run = '--dry-run' in sys.argv
     auto_yes = '--yes' in sys.argv
+    report_path = get_report_arg()
 
     if dry_run:
         print("🔍 DRY RUN MODE - No files will be modified\n")
@@ -99,8 +117,16 @@ def main():
         print()
 
     total_replacements = 0
+    total_unfixed = 0
+
+    files_to_fix = FILES_TO_FIX
+    violations = None
+    if report_path:
+        violations = load_report(report_path, [SNIFF_DATE])
+        files_to_fix = sorted(violations)
+        print(f"📋 Using phpcs report: {report_path} ({len(files_to_fix)} files flagged)\n")
 
-    for file_path in FILES_TO_FIX:
+    for file_path in files_to_fix:
         if not os.path.exists(file_path):
             print(f"⏭️  Skipping {file_path} (not found)")
             continue
@@ -110,10 +136,19 @@ def main():
         with open(file_path, 'r', encoding='utf-8') as f:
             original = f.read()
 
-        fixed, count = fix_date_calls(original)
+        fixed, count, unfixed = fix_date_calls(original, violations[file_path] if violations is not None else None)
+
+        if unfixed:
+            total_unfixed += len(unfixed)
+            lines = sorted({line for line, _, _ in unfixed})
+            print(f"  ✋ {len(lines)} flagged line(s) need a manual fix (format not covered): "
+                  + ', '.join(str(line) for line in lines))
 
         if count == 0:
-            print(f"  ℹ️  No date() calls found\n")
+            if violations is None:
+                print(f"  ℹ️  No date() calls found\n")
+            else:
+                print()
             continue
 
         total_replacements += count
@@ -134,6 +169,8 @@ def main():
 
     print(f"\n{'📊 Summary:' if dry_run else '✅ Complete!'}")
     print(f"Total replacements: {total_replacements}")
+    if total_unfixed:
+        print(f"⚠️  Flagged by phpcs but not fixed: {total_unfixed} - fix by hand")
 
     if not dry_run and total_replacements > 0:
         print("\n📋 Next steps:")
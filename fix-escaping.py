@@ -11,13 +11,18 @@ This script safely replaces:
 Usage:
     python3 fix-escaping.py --dry-run  # Preview changes
     python3 fix-escaping.py            # Apply changes
+
+    # Only fix lines flagged in a saved phpcs JSON report (see phpcs_report.py)
+    python3 fix-escaping.py --report=phpcs-report.json --dry-run
 """
 
 import re
 import os
 import sys
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+from phpcs_report import LineViolations, ViolationIndex, apply_line_fixes, count_violations, get_report_arg, load_report
 
 # Directories to process
 DIRS_TO_PROCESS = ['msh-image-optimizer/admin', 'msh-image-optimizer/includes']
@@ -31,6 +36,45 @@ EXCLUDE_PATTERNS = [
 # Backup extension
 BACKUP_EXT = '.pre-escaping-fix'
 
+# phpcs sniffs this script knows how to fix (for --report mode)
+SNIFF_UNSAFE_PRINTING = 'WordPress.Security.EscapeOutput.UnsafePrintingFunction'
+SNIFF_OUTPUT_NOT_ESCAPED = 'WordPress.Security.EscapeOutput.OutputNotEscaped'
+
+# (sniff, pattern, replacement), applied in order
+ESCAPING_FIXES = [
+    # Fix 1: <?php _e( -> <?php esc_html_e(
+    (SNIFF_UNSAFE_PRINTING, r'<\?php\s+_e\(', r'<?php esc_html_e('),
+
+    # Fix 2: _e( not preceded by esc_
+    # Only match _e( that's not already esc_html_e( or esc_attr_e(
+    (SNIFF_UNSAFE_PRINTING,
+     r'(?<!esc_html_)(?<!esc_attr_)(?<!esc_js_)(?<!esc_textarea_)\b_e\(',
+     r'esc_html_e('),
+
+    # Fix 3: echo __( without esc_ -> echo esc_html( __(
+    # Closing paren is NOT added - flagged for manual review in the summary
+    (SNIFF_OUTPUT_NOT_ESCAPED, r'\becho\s+__\(', r'echo esc_html( __('),
+
+    # Fix 4: print __( without esc_ -> print esc_html( __(
+    (SNIFF_OUTPUT_NOT_ESCAPED, r'\bprint\s+__\(', r'print esc_html( __('),
+
+    # Fix 5: <?= $var ?> -> <?= esc_html( $var ) ?>
+    (SNIFF_OUTPUT_NOT_ESCAPED,
+     r'<\?=\s*\$([a-zA-Z_][a-zA-Z0-9_]*)\s*\?>',
+     r'<?= esc_html( $\1 ) ?>'),
+
+    # Fix 6: echo $var; -> echo esc_html( $var );
+    # Only simple cases where it's clearly HTML context
+    (SNIFF_OUTPUT_NOT_ESCAPED,
+     r'\becho\s+\$([a-zA-Z_][a-zA-Z0-9_]*)\s*;',
+     r'echo esc_html( $\1 );'),
+
+    # Fix 7: print $var; -> print esc_html( $var );
+    (SNIFF_OUTPUT_NOT_ESCAPED,
+     r'\bprint\s+\$([a-zA-Z_][a-zA-Z0-9_]*)\s*;',
+     r'print esc_html( $\1 );'),
+]
+
 
 class EscapingFixer:
     """Fixes WordPress escaping violations"""
@@ -40,6 +84,7 @@ class EscapingFixer:
         self.files_processed = 0
         self.replacements_made = 0
         self.files_with_changes = []
+        self.unfixed_locations = 0
 
     def should_exclude(self, filepath: str) -> bool:
         """Check if file should be excluded"""
@@ -48,8 +93,14 @@ class EscapingFixer:
                 return True
         return False
 
-    def fix_file(self, filepath: Path) -> int:
-        """Fix escaping in a single file. Returns number of changes."""
+    def fix_file(self, filepath: Path, violations: Optional[LineViolations] = None) -> int:
+        """
+        Fix escaping in a single file. Returns number of changes.
+
+        If violations ({line: [(column, sniff_source)]}) is given, only the
+        fixes matching each reported sniff are applied, and only at the
+        reported columns.
+        """
         if self.should_exclude(str(filepath)):
             return 0
 
@@ -61,70 +112,15 @@ class EscapingFixer:
             return 0
 
         original_content = content
-        changes = 0
-
-        # Fix 1: <?php _e( -> <?php esc_html_e(
-        content, n = re.subn(
-            r'<\?php\s+_e\(',
-            r'<?php esc_html_e(',
-            content
-        )
-        changes += n
-
-        # Fix 2: _e( not preceded by esc_
-        # Only match _e( that's not already esc_html_e( or esc_attr_e(
-        content, n = re.subn(
-            r'(?<!esc_html_)(?<!esc_attr_)(?<!esc_js_)(?<!esc_textarea_)\b_e\(',
-            r'esc_html_e(',
-            content
-        )
-        changes += n
-
-        # Fix 3: echo __( without esc_ -> echo esc_html( __(
-        # Match: echo __('text', 'domain')
-        content, n = re.subn(
-            r'\becho\s+__\(',
-            r'echo esc_html( __(',
-            content
-        )
-        if n > 0:
-            # Also need to add closing paren
-            # This is trickier - we need to match the full statement
-            # For now, flag for manual review
-            changes += n
-
-        # Fix 4: print __( without esc_ -> print esc_html( __(
-        content, n = re.subn(
-            r'\bprint\s+__\(',
-            r'print esc_html( __(',
-            content
-        )
-        changes += n
-
-        # Fix 5: <?= $var ?> -> <?= esc_html( $var ) ?>
-        content, n = re.subn(
-            r'<\?=\s*\$([a-zA-Z_][a-zA-Z0-9_]*)\s*\?>',
-            r'<?= esc_html( $\1 ) ?>',
-            content
-        )
-        changes += n
-
-        # Fix 6: echo $var; -> echo esc_html( $var );
-        # Only simple cases where it's clearly HTML context
-        content, n = re.subn(
-            r'\becho\s+\$([a-zA-Z_][a-zA-Z0-9_]*)\s*;',
-            r'echo esc_html( $\1 );',
-            content
-        )
-        changes += n
-
-        # Fix 7: print $var; -> print esc_html( $var );
-        content, n = re.subn(
-            r'\bprint\s+\$([a-zA-Z_][a-zA-Z0-9_]*)\s*;',
-            r'print esc_html( $\1 );',
-            content
-        )
-        changes += n
+
+        if violations is None:
+            changes = 0
+            for _, pattern, replacement in ESCAPING_FIXES:
+                content, n = re.subn(pattern, replacement, content)
+                changes += n
+        else:
+            content, changes, unfixed = apply_line_fixes(content, violations, ESCAPING_FIXES)
+            self.unfixed_locations += len(unfixed)
 
         if changes > 0:
             self.files_with_changes.append(str(filepath))
@@ -158,6 +154,20 @@ class EscapingFixer:
             self.files_processed += 1
             self.fix_file(php_file)
 
+    def process_report(self, violations: ViolationIndex):
+        """Process only the files and lines flagged in a phpcs report"""
+        for rel_path in sorted(violations):
+            if not any(rel_path.startswith(d.rstrip('/') + '/') for d in DIRS_TO_PROCESS):
+                continue
+
+            file_path = Path(rel_path)
+            if not file_path.exists():
+                print(f"⚠️  File not found: {rel_path}")
+                continue
+
+            self.files_processed += 1
+            self.fix_file(file_path, violations[rel_path])
+
     def print_summary(self):
         """Print summary of changes"""
         print("\n" + "="*70)
@@ -166,6 +176,8 @@ class EscapingFixer:
         print(f"Files processed: {self.files_processed}")
         print(f"Files with changes: {len(self.files_with_changes)}")
         print(f"Total replacements: {self.replacements_made}")
+        if self.unfixed_locations:
+            print(f"Reported but not fixed: {self.unfixed_locations} (see ⚠️  lines above)")
 
         if self.dry_run:
             print("\n⚠️  DRY RUN MODE - No files were modified")
@@ -193,6 +205,7 @@ class EscapingFixer:
 def main():
     """Main entry point"""
     dry_run = '--dry-run' in sys.argv
+    report_path = get_report_arg()
 
     print("WordPress Escaping Compliance Fixer")
     print("="*70)
@@ -208,9 +221,15 @@ def main():
 
     fixer = EscapingFixer(dry_run=dry_run)
 
-    for directory in DIRS_TO_PROCESS:
-        print(f"\n📁 Processing: {directory}")
-        fixer.process_directory(directory)
+    if report_path:
+        violations = load_report(report_path, [SNIFF_UNSAFE_PRINTING, SNIFF_OUTPUT_NOT_ESCAPED])
+        print(f"\n📋 Using phpcs report: {report_path}")
+        print(f"   {count_violations(violations)} flagged lines in {len(violations)} files")
+        fixer.process_report(violations)
+    else:
+        for directory in DIRS_TO_PROCESS:
+            print(f"\n📁 Processing: {directory}")
+            fixer.process_directory(directory)
 
     fixer.print_summary()
 
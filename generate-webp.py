@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Offline WebP Backfill
+Generates WebP siblings for an uploads tree, matching MSH_WebP_Delivery
+
+MSH_WebP_Delivery only serves WebP when webp_exists() finds a file at
+get_webp_path(), i.e. the source path with a trailing .jpg/.jpeg/.png
+(case-insensitive) swapped for .webp. Request-time conversion in
+MSH_Image_Optimizer::convert_to_webp() only covers images that get
+optimized, so this script backfills the whole library in one offline job:
+
+- Walks the uploads tree, or every file + size listed in exported
+  attachment metadata (--metadata)
+- Skips sources whose WebP is already at least as new (same rule as the
+  optimizer: convert only if the source is newer)
+- Converts in a process pool; each worker has a memory cap and is
+  recycled periodically, and oversized images are skipped
+- Writes atomically (temp file + rename) to exactly the delivery path
+- Reports bytes saved per directory
+
+Requires Pillow with WebP support: pip install Pillow
+
+Export attachment metadata (optional, one JSON object per line):
+    wp eval 'foreach ( get_posts( array( "post_type" => "attachment", "post_mime_type" => "image", "posts_per_page" => -1, "fields" => "ids" ) ) as $id ) { echo wp_json_encode( wp_get_attachment_metadata( $id ) ) . "\\n"; }' > attachment-metadata.jsonl
+
+Usage:
+    python3 generate-webp.py --uploads=/path/to/wp-content/uploads --dry-run
+    python3 generate-webp.py --uploads=/path/to/wp-content/uploads
+    python3 generate-webp.py --uploads=... --metadata=attachment-metadata.jsonl --workers=8
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import warnings
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Checked in main() so --help still works
+    Image = None
+
+# Same pattern as MSH_WebP_Delivery::get_webp_path()
+WEBP_SOURCE_RE = re.compile(r'\.(jpg|jpeg|png)$', re.IGNORECASE)
+
+# Same quality as MSH_Image_Optimizer::convert_to_webp()
+DEFAULT_QUALITY = 85
+
+# Plugin-owned folders inside uploads that must not get WebP siblings
+EXCLUDE_DIRS = ['msh-rename-backups']
+
+# Worker limits. Peak memory per pixel covers the decoded image, the
+# exif_transpose()/convert() copies and libwebp's encoder buffers (measured
+# at ~20-25 bytes/px, so 32 leaves headroom). WORKER_BASE_MB is the
+# interpreter + Pillow/libwebp mappings counted against RLIMIT_AS.
+DEFAULT_WORKER_MEMORY_MB = 1024
+WORKER_BASE_MB = 160
+BYTES_PER_PIXEL = 32
+UNCAPPED_MAX_PIXELS = 50_000_000  # Used when --worker-memory-mb=0
+IMAGES_PER_WORKER = 200           # Recycle workers to return memory to the OS
+POOL_CHUNKSIZE = 8                # Images handed to a worker per task
+
+
+def get_webp_path(source_path: str) -> str:
+    """Mirror of MSH_WebP_Delivery::get_webp_path() for a filesystem path"""
+    return WEBP_SOURCE_RE.sub('.webp', source_path)
+
+
+def walk_uploads(uploads: Path) -> Iterator[Path]:
+    """Yield every JPEG/PNG under the uploads dir"""
+    for root, dirs, files in os.walk(uploads):
+        dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
+        for name in files:
+            if WEBP_SOURCE_RE.search(name):
+                yield Path(root) / name
+
+
+def metadata_files(uploads: Path, metadata_path: str) -> Tuple[List[Path], int, int]:
+    """
+    Return (paths, missing, skipped_lines) for every file and size listed
+    in exported attachment metadata. Size files live next to the main file.
+
+    Lines that aren't JSON (PHP notices mixed into the wp eval output) are
+    skipped and counted rather than aborting the backfill.
+    """
+    paths = []
+    missing = 0
+    skipped_lines = 0
+
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                meta = json.loads(line)
+            except ValueError:
+                skipped_lines += 1
+                continue
+            if not isinstance(meta, dict) or not meta.get('file'):
+                continue
+
+            main_file = uploads / meta['file']
+            names = [main_file.name]
+            if meta.get('original_image'):
+                names.append(meta['original_image'])
+            for size in (meta.get('sizes') or {}).values():
+                if isinstance(size, dict) and size.get('file'):
+                    names.append(size['file'])
+
+            for name in dict.fromkeys(names):
+                if not WEBP_SOURCE_RE.search(name):
+                    continue
+                path = main_file.parent / name
+                if path.exists():
+                    paths.append(path)
+                else:
+                    missing += 1
+
+    return paths, missing, skipped_lines
+
+
+def plan_conversions(sources: List[Path]) -> Tuple[List[Tuple[str, str]], int, List[str]]:
+    """
+    Pair each source with its WebP target and drop up-to-date ones.
+
+    Returns (jobs, up_to_date, conflicts). A conflict is two sources
+    (e.g. photo.jpg and photo.png) that map to the same WebP path; those
+    are skipped rather than letting one silently overwrite the other.
+    """
+    by_target: Dict[str, List[str]] = {}
+    for source in dict.fromkeys(sources):
+        by_target.setdefault(get_webp_path(str(source)), []).append(str(source))
+
+    jobs = []
+    up_to_date = 0
+    conflicts = []
+
+    for target, candidates in by_target.items():
+        if len(candidates) > 1:
+            conflicts.append(target)
+            continue
+
+        source = candidates[0]
+        try:
+            # Optimizer rule: convert if WebP is missing or source is newer
+            if os.path.getmtime(source) <= os.path.getmtime(target):
+                up_to_date += 1
+                continue
+        except OSError:
+            pass  # WebP doesn't exist yet
+        jobs.append((source, target))
+
+    return jobs, up_to_date, conflicts
+
+
+def max_pixels_for(memory_mb: int) -> int:
+    """Largest image (in pixels) a worker can convert within memory_mb"""
+    if memory_mb <= 0:
+        return UNCAPPED_MAX_PIXELS
+    return max(1_000_000, (memory_mb - WORKER_BASE_MB) * 1024 * 1024 // BYTES_PER_PIXEL)
+
+
+def is_memory_error(error: Exception) -> bool:
+    """True for failures caused by the worker's memory cap"""
+    # libwebp reports VP8_ENC_ERROR_OUT_OF_MEMORY as "encoding error 1"
+    return isinstance(error, MemoryError) or str(error).strip() == 'encoding error 1'
+
+
+def init_worker(memory_mb: int, max_pixels: int):
+    """Cap each worker's address space and decoded image size"""
+    if memory_mb > 0:
+        try:
+            import resource
+            limit = memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass  # Not supported on this platform
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    # Oversized images are reported as too_large; no need for Pillow's warning
+    warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+
+
+def convert_one(job: Tuple[str, str, int]) -> Tuple[str, str, int, int, Optional[str]]:
+    """
+    Convert one source to WebP. Runs in a worker process.
+
+    Returns (source, status, source_bytes, webp_bytes, error).
+    """
+    source, target, quality = job
+    source_bytes = os.path.getsize(source)
+    tmp_path = None
+
+    try:
+        with Image.open(source) as image:
+            if image.width * image.height > Image.MAX_IMAGE_PIXELS:
+                return source, 'too_large', source_bytes, 0, f'{image.width}x{image.height}'
+
+            # Browsers honour EXIF rotation on the JPEG; bake it into the WebP
+            image = ImageOps.exif_transpose(image)
+
+            # Keep PNG transparency, flatten everything else to RGB
+            has_alpha = image.mode in ('RGBA', 'LA') or (
+                image.mode == 'P' and 'transparency' in image.info
+            )
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(target), prefix='.msh-webp-', suffix='.tmp'
+            )
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, 'WEBP', quality=quality, method=4)
+
+        os.chmod(tmp_path, os.stat(source).st_mode & 0o777)
+        os.replace(tmp_path, target)
+        tmp_path = None
+        return source, 'converted', source_bytes, os.path.getsize(target), None
+
+    except Image.DecompressionBombError as e:
+        return source, 'too_large', source_bytes, 0, str(e)
+    except Exception as e:
+        if is_memory_error(e):
+            return source, 'too_large', source_bytes, 0, 'worker memory limit reached'
+        return source, 'failed', source_bytes, 0, str(e)
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def format_bytes(count: int) -> str:
+    size = float(abs(count))
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            break
+        size /= 1024
+    return f"{'-' if count < 0 else ''}{size:.1f} {unit}"
+
+
+def print_directory_report(per_dir: Dict[str, List[int]]):
+    """Print source vs WebP bytes for each directory, biggest savings first"""
+    print(f"\n{'Directory':<40} {'Files':>7} {'Source':>12} {'WebP':>12} {'Saved':>12}")
+    print("-" * 87)
+    rows = sorted(per_dir.items(), key=lambda item: item[1][1] - item[1][2], reverse=True)
+    for directory, (files, source_bytes, webp_bytes) in rows:
+        saved = source_bytes - webp_bytes
+        print(f"{directory:<40} {files:>7} {format_bytes(source_bytes):>12} "
+              f"{format_bytes(webp_bytes):>12} {format_bytes(saved):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill WebP files for MSH_WebP_Delivery.')
+    parser.add_argument('--uploads', required=True, help='WordPress uploads directory (basedir)')
+    parser.add_argument('--metadata', help='JSON Lines export of attachment metadata')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--quality', type=int, default=DEFAULT_QUALITY)
+    parser.add_argument('--max-pixels', type=int,
+                        help='Skip images larger than this (default: derived from --worker-memory-mb)')
+    parser.add_argument('--worker-memory-mb', type=int, default=DEFAULT_WORKER_MEMORY_MB,
+                        help='Address-space cap per worker, 0 to disable')
+    parser.add_argument('--dry-run', action='store_true', help='Plan only, write nothing')
+    args = parser.parse_args()
+    if args.max_pixels is None:
+        args.max_pixels = max_pixels_for(args.worker_memory_mb)
+
+    print("MSH Image Optimizer - Offline WebP Backfill")
+    print("=" * 70)
+
+    if Image is None or not features.check('webp'):
+        print("❌ Pillow with WebP support is required: pip install Pillow")
+        sys.exit(1)
+
+    uploads = Path(args.uploads)
+    if not uploads.is_dir():
+        print(f"❌ Uploads directory not found: {uploads}")
+        sys.exit(1)
+
+    if args.dry_run:
+        print("🔍 DRY RUN MODE - No files will be written\n")
+
+    if args.metadata:
+        sources, missing, skipped_lines = metadata_files(uploads, args.metadata)
+        print(f"📋 Attachment metadata: {len(sources)} files ({missing} listed but missing on disk)")
+        if skipped_lines:
+            print(f"   ⚠️  {skipped_lines} non-JSON line(s) skipped (PHP notices in the export?)")
+    else:
+        sources = list(walk_uploads(uploads))
+        print(f"📁 Uploads tree: {len(sources)} JPEG/PNG files")
+
+    jobs, up_to_date, conflicts = plan_conversions(sources)
+    print(f"   {up_to_date} already have an up-to-date WebP")
+    print(f"   {len(jobs)} to convert (images over {args.max_pixels / 1e6:.1f} MP are skipped)")
+    if conflicts:
+        print(f"   ⚠️  {len(conflicts)} skipped - several sources map to the same WebP path:")
+        for target in conflicts[:10]:
+            print(f"      {os.path.relpath(target, uploads)}")
+
+    if args.dry_run or not jobs:
+        return
+
+    per_dir: Dict[str, List[int]] = {}
+    failures = []
+    too_large = []
+    done = 0
+
+    work = ((source, target, args.quality) for source, target in jobs)
+    # Pool counts each chunk as one task, so recycle after
+    # IMAGES_PER_WORKER images rather than that many chunks
+    with Pool(args.workers, initializer=init_worker,
+              initargs=(args.worker_memory_mb, args.max_pixels),
+              maxtasksperchild=max(1, IMAGES_PER_WORKER // POOL_CHUNKSIZE)) as pool:
+        for source, status, source_bytes, webp_bytes, error in pool.imap_unordered(
+                convert_one, work, chunksize=POOL_CHUNKSIZE):
+            done += 1
+            if status == 'converted':
+                directory = os.path.relpath(os.path.dirname(source), uploads)
+                stats = per_dir.setdefault(directory, [0, 0, 0])
+                stats[0] += 1
+                stats[1] += source_bytes
+                stats[2] += webp_bytes
+            elif status == 'too_large':
+                too_large.append((source, error))
+            else:
+                failures.append((source, error))
+
+            if done % 500 == 0:
+                print(f"   ... {done}/{len(jobs)}")
+
+    print_directory_report(per_dir)
+
+    converted = sum(stats[0] for stats in per_dir.values())
+    saved = sum(stats[1] - stats[2] for stats in per_dir.values())
+    print(f"\n✅ Converted {converted} files, saved {format_bytes(saved)}")
+
+    if too_large:
+        print(f"⚠️  {len(too_large)} skipped as too large for a worker "
+              f"(--max-pixels={args.max_pixels}, --worker-memory-mb={args.worker_memory_mb}):")
+        for source, dims in too_large[:10]:
+            print(f"   {os.path.relpath(source, uploads)} ({dims})")
+    if failures:
+        print(f"❌ {len(failures)} failed:")
+        for source, error in failures[:20]:
+            print(f"   {os.path.relpath(source, uploads)}: {error}")
+
+    print("\n📋 Next steps:")
+    print("1. Spot-check a few WebP files in the browser")
+    print("2. Run 'Verify WebP Status' in the optimizer to refresh per-attachment status")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,728 @@
+#!/usr/bin/env python3
+"""
+Incremental i18n Catalog Sync
+Keeps the .pot template and every .po catalog in step with the PHP sources
+
+Unlike i18n-audit.sh (which re-greps everything), this script keeps a
+source-reference index (.i18n-sync-index.json) holding a content hash and
+the extracted gettext calls for every PHP file. Only files whose hash
+changed are re-extracted, so a refresh after a codemod pass scales with the
+number of touched files, not with catalog size x locales.
+
+Catalogs are updated in parallel with minimal rewrites: an entry is copied
+byte-for-byte unless its references, comments or flags actually changed,
+and files whose content would not change are not written at all.
+
+msgids that a codemod altered (e.g. fix-escaping.py mangling a string while
+rewriting _e() -> esc_html_e()) are flagged. The previous version of a
+changed file comes from the index, or from the codemod's .pre-* backup when
+the file is not indexed yet. In .po files an altered msgid inherits the old
+translation marked #, fuzzy, the same way msgmerge would.
+
+Usage:
+    python3 i18n-catalog-sync.py --dry-run  # Report what would change
+    python3 i18n-catalog-sync.py            # Update .pot and .po files
+    python3 i18n-catalog-sync.py --full     # Ignore the index, re-extract all
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Plugin root - references in the catalogs are relative to this
+PLUGIN_DIR = 'msh-image-optimizer'
+MAIN_FILE = 'msh-image-optimizer.php'
+TEXT_DOMAIN = 'msh-image-optimizer'
+
+LANGUAGES_DIR = 'msh-image-optimizer/languages'
+POT_FILE = 'msh-image-optimizer.pot'
+
+# Source-reference index (gitignored cache)
+INDEX_FILE = '.i18n-sync-index.json'
+INDEX_VERSION = 1
+
+# Files to exclude from extraction
+EXCLUDE_PATTERNS = [
+    'vendor/',
+    'node_modules/',
+    'tests/',
+    'test-',
+]
+
+# Backups written by the fix-*.py codemods
+CODEMOD_BACKUP_EXTS = ['.pre-escaping-fix', '.pre-date-fix']
+
+# Gettext function -> argument roles (None = ignored, e.g. $number)
+GETTEXT_FUNCTIONS = {
+    '__': ['msgid', 'domain'],
+    '_e': ['msgid', 'domain'],
+    'esc_html__': ['msgid', 'domain'],
+    'esc_html_e': ['msgid', 'domain'],
+    'esc_attr__': ['msgid', 'domain'],
+    'esc_attr_e': ['msgid', 'domain'],
+    '_x': ['msgid', 'context', 'domain'],
+    '_ex': ['msgid', 'context', 'domain'],
+    'esc_html_x': ['msgid', 'context', 'domain'],
+    'esc_attr_x': ['msgid', 'context', 'domain'],
+    '_n': ['msgid', 'plural', None, 'domain'],
+    '_nx': ['msgid', 'plural', None, 'context', 'domain'],
+    '_n_noop': ['msgid', 'plural', 'domain'],
+    '_nx_noop': ['msgid', 'plural', 'context', 'domain'],
+}
+
+# Plugin header fields extracted from the main file, as WP-CLI does
+PLUGIN_HEADERS = ['Plugin Name', 'Plugin URI', 'Description', 'Author', 'Author URI']
+
+GETTEXT_CALL_RE = re.compile(
+    r'(?<![\w$>:])(' + '|'.join(sorted(GETTEXT_FUNCTIONS, key=len, reverse=True)) + r')\s*\('
+)
+TRANSLATORS_COMMENT_RE = re.compile(
+    r'(?:/\*+\s*(translators:.*?)\s*\*+/|//\s*(translators:[^\n]*))',
+    re.IGNORECASE | re.DOTALL
+)
+PHP_FORMAT_RE = re.compile(r'%(?:\d+\$)?[-+ 0#]*\d*(?:\.\d+)?[bcdeEfFgGosuxX]')
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+def file_hash(content: bytes) -> str:
+    """Content hash used to decide whether a file needs re-extraction"""
+    return hashlib.sha1(content).hexdigest()
+
+
+def php_string_literal(raw: str) -> Optional[str]:
+    """Return the value of a single PHP string literal, or None if raw isn't one"""
+    raw = raw.strip()
+    if len(raw) < 2 or raw[0] not in '\'"' or raw[-1] != raw[0]:
+        return None
+
+    quote = raw[0]
+    body = raw[1:-1]
+    value = []
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        if ch == quote:
+            return None  # Unescaped quote - concatenation or similar
+        if ch == '\\' and i + 1 < len(body):
+            nxt = body[i + 1]
+            if quote == "'":
+                value.append(nxt if nxt in '\\\'' else ch + nxt)
+            else:
+                escapes = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\', '$': '$'}
+                value.append(escapes.get(nxt, ch + nxt))
+            i += 2
+            continue
+        if quote == '"' and ch == '$':
+            return None  # Interpolated variable - not a constant string
+        value.append(ch)
+        i += 1
+
+    return ''.join(value)
+
+
+def split_call_args(content: str, open_pos: int) -> Optional[List[str]]:
+    """Split the top-level arguments of the call whose '(' is at open_pos"""
+    args = []
+    depth = 0
+    start = open_pos + 1
+    i = start
+    quote = None
+
+    while i < len(content):
+        ch = content[i]
+        if quote:
+            if ch == '\\':
+                i += 2
+                continue
+            if ch == quote:
+                quote = None
+        elif ch in '\'"':
+            quote = ch
+        elif ch in '([{':
+            depth += 1
+        elif ch in ')]}':
+            if depth == 0:
+                args.append(content[start:i])
+                return args
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            args.append(content[start:i])
+            start = i + 1
+        i += 1
+
+    return None
+
+
+def find_translator_comment(content: str, call_pos: int) -> Optional[str]:
+    """Return a translators: comment ending on the call's line or the line before"""
+    line_start = content.rfind('\n', 0, call_pos) + 1
+    prev_line_start = content.rfind('\n', 0, max(line_start - 1, 0)) + 1
+    window = content[prev_line_start:call_pos]
+
+    comment = None
+    for match in TRANSLATORS_COMMENT_RE.finditer(window):
+        comment = match.group(1) or match.group(2)
+    if comment is None:
+        return None
+
+    # Collapse multi-line block comments the way WP-CLI does
+    lines = [re.sub(r'^\s*\*\s?', '', part).strip() for part in comment.splitlines()]
+    return ' '.join(line for line in lines if line)
+
+
+def extract_php(content: str) -> List[dict]:
+    """Extract gettext calls for TEXT_DOMAIN from PHP source"""
+    entries = []
+
+    for match in GETTEXT_CALL_RE.finditer(content):
+        function = match.group(1)
+        args = split_call_args(content, match.end() - 1)
+        if args is None:
+            continue
+
+        roles = GETTEXT_FUNCTIONS[function]
+        values = {}
+        for role, raw in zip(roles, args):
+            if role is None:
+                continue
+            values[role] = php_string_literal(raw)
+
+        if values.get('domain') != TEXT_DOMAIN or not values.get('msgid'):
+            continue
+        if 'plural' in roles and values.get('plural') is None:
+            continue
+        if 'context' in roles and values.get('context') is None:
+            continue
+
+        entries.append({
+            'msgid': values['msgid'],
+            'plural': values.get('plural'),
+            'context': values.get('context'),
+            'line': content.count('\n', 0, match.start()) + 1,
+            'comment': find_translator_comment(content, match.start()),
+            'function': function,
+        })
+
+    return entries
+
+
+def extract_plugin_headers(content: str) -> List[dict]:
+    """Extract the translatable plugin header fields"""
+    entries = []
+    for header in PLUGIN_HEADERS:
+        match = re.search(r'^[ \t/*#@]*' + re.escape(header) + r':(.*)$', content, re.MULTILINE)
+        if not match or not match.group(1).strip():
+            continue
+        entries.append({
+            'msgid': match.group(1).strip(),
+            'plural': None,
+            'context': None,
+            'line': None,
+            'comment': f'{header} of the plugin',
+            'function': None,
+        })
+    return entries
+
+
+def extract_file(rel_path: str) -> Tuple[str, str, List[dict]]:
+    """Hash and extract one plugin file. Returns (rel_path, hash, entries)."""
+    with open(Path(PLUGIN_DIR) / rel_path, 'rb') as f:
+        raw = f.read()
+
+    content = raw.decode('utf-8', errors='replace')
+    entries = extract_php(content)
+    if rel_path == MAIN_FILE:
+        entries = extract_plugin_headers(content) + entries
+
+    return rel_path, file_hash(raw), entries
+
+
+def find_source_files() -> List[str]:
+    """List PHP files under the plugin dir, relative to it"""
+    files = []
+    for php_file in sorted(Path(PLUGIN_DIR).glob('**/*.php')):
+        rel_path = php_file.relative_to(PLUGIN_DIR).as_posix()
+        if any(pattern in rel_path for pattern in EXCLUDE_PATTERNS):
+            continue
+        files.append(rel_path)
+    return files
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+def load_index(full: bool) -> dict:
+    """Load the source-reference index, or start empty"""
+    if full or not os.path.exists(INDEX_FILE):
+        return {'version': INDEX_VERSION, 'files': {}}
+    try:
+        with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Ignoring unreadable index {INDEX_FILE}: {e}")
+        return {'version': INDEX_VERSION, 'files': {}}
+    if index.get('version') != INDEX_VERSION:
+        return {'version': INDEX_VERSION, 'files': {}}
+    return index
+
+
+def changed_files(index: dict, files: List[str]) -> List[str]:
+    """Return the files whose content hash differs from the index"""
+    changed = []
+    for rel_path in files:
+        cached = index['files'].get(rel_path)
+        if cached is None:
+            changed.append(rel_path)
+            continue
+        with open(Path(PLUGIN_DIR) / rel_path, 'rb') as f:
+            if file_hash(f.read()) != cached['hash']:
+                changed.append(rel_path)
+    return changed
+
+
+def build_catalog(index: dict) -> Dict[tuple, dict]:
+    """Merge indexed entries into {(context, msgid): entry}, in source order"""
+    catalog: Dict[tuple, dict] = {}
+
+    # Main file first (plugin headers), then everything else by path
+    paths = sorted(index['files'], key=lambda p: (p != MAIN_FILE, p))
+    for rel_path in paths:
+        for item in index['files'][rel_path]['entries']:
+            key = (item['context'], item['msgid'])
+            entry = catalog.setdefault(key, {
+                'context': item['context'],
+                'msgid': item['msgid'],
+                'plural': item['plural'],
+                'refs': [],
+                'comments': [],
+            })
+            ref = rel_path if item['line'] is None else f"{rel_path}:{item['line']}"
+            if ref not in entry['refs']:
+                entry['refs'].append(ref)
+            if item['comment'] and item['comment'] not in entry['comments']:
+                entry['comments'].append(item['comment'])
+            if entry['plural'] is None and item['plural']:
+                entry['plural'] = item['plural']
+
+    for entry in catalog.values():
+        entry['refs'].sort(key=ref_sort_key)
+        text = entry['msgid'] + (entry['plural'] or '')
+        entry['php_format'] = bool(PHP_FORMAT_RE.search(text.replace('%%', '')))
+
+    return catalog
+
+
+def ref_sort_key(ref: str) -> tuple:
+    """Sort references by path, then numerically by line"""
+    path, _, line = ref.partition(':')
+    return (path, int(line) if line.isdigit() else 0)
+
+
+def diff_msgids(old_entries: List[dict], new_entries: List[dict]) -> Tuple[set, set]:
+    """Return (removed, added) msgid keys between two extractions of a file"""
+    old_keys = {(e['context'], e['msgid']) for e in old_entries}
+    new_keys = {(e['context'], e['msgid']) for e in new_entries}
+    return old_keys - new_keys, new_keys - old_keys
+
+
+def find_codemod_backup(rel_path: str) -> Optional[Path]:
+    """Return the newest .pre-* codemod backup of a plugin file, if any"""
+    backups = [Path(PLUGIN_DIR) / (rel_path + ext) for ext in CODEMOD_BACKUP_EXTS]
+    backups = [b for b in backups if b.exists()]
+    return max(backups, key=lambda b: b.stat().st_mtime) if backups else None
+
+
+# ---------------------------------------------------------------------------
+# Catalog files
+# ---------------------------------------------------------------------------
+
+def po_escape(text: str) -> str:
+    return (text.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n').replace('\t', '\\t'))
+
+
+def po_unescape(text: str) -> str:
+    escapes = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+    return re.sub(r'\\(.)', lambda m: escapes.get(m.group(1), m.group(0)), text)
+
+
+def parse_block(raw: str) -> dict:
+    """Parse one catalog entry block into its parts (raw text is kept)"""
+    block = {
+        'raw': raw,
+        'obsolete': False,
+        'refs': [],
+        'extracted': [],
+        'translator': [],
+        'flags': [],
+        'fields': {},
+    }
+    current = None
+
+    for line in raw.split('\n'):
+        if line.startswith('#~'):
+            block['obsolete'] = True
+            line = line[2:].lstrip()
+            if not line:
+                continue
+        if line.startswith('#:'):
+            block['refs'].extend(line[2:].split())
+        elif line.startswith('#.'):
+            block['extracted'].append(line[2:].strip())
+        elif line.startswith('#,'):
+            block['flags'].extend(f.strip() for f in line[2:].split(','))
+        elif line.startswith('#'):
+            block['translator'].append(line)
+        elif line.startswith('"') and current:
+            block['fields'][current] += po_unescape(line.strip()[1:-1])
+        else:
+            match = re.match(r'^(msgctxt|msgid_plural|msgid|msgstr(?:\[\d+\])?)\s+"(.*)"\s*$', line)
+            if match:
+                current = match.group(1)
+                block['fields'][current] = po_unescape(match.group(2))
+
+    block['key'] = (block['fields'].get('msgctxt'), block['fields'].get('msgid'))
+    block['translated'] = any(
+        value for name, value in block['fields'].items() if name.startswith('msgstr')
+    )
+    return block
+
+
+def parse_catalog(text: str) -> Tuple[List[str], str, List[dict]]:
+    """
+    Split a .pot/.po file into (preamble, header, entry blocks).
+
+    The header is the msgid "" block, wherever it sits; comment-only
+    blocks before it (e.g. a copyright notice separated by a blank line)
+    are returned verbatim as the preamble.
+    """
+    raw_blocks = [b.strip('\n') for b in re.split(r'\n\s*\n', text) if b.strip()]
+    blocks = [parse_block(raw) for raw in raw_blocks]
+
+    for i, block in enumerate(blocks):
+        if 'msgid' not in block['fields']:
+            continue
+        if block['key'] == (None, '') and not block['obsolete']:
+            return [b['raw'] for b in blocks[:i]], block['raw'], blocks[i + 1:]
+        break
+
+    return [], '', blocks
+
+
+def plural_count(header: str) -> int:
+    """Number of plural forms declared by the header's Plural-Forms (default 2)"""
+    match = re.search(r'nplurals\s*=\s*(\d+)', header)
+    return int(match.group(1)) if match else 2
+
+
+def normalize_ref(ref: str) -> str:
+    """Map repo-relative references (msh-image-optimizer/admin/...) to plugin-relative"""
+    prefix = PLUGIN_DIR + '/'
+    return ref[len(prefix):] if ref.startswith(prefix) else ref
+
+
+def block_matches(block: dict, entry: dict) -> bool:
+    """True if an existing block already describes the entry exactly"""
+    refs = sorted({normalize_ref(r) for r in block['refs']}, key=ref_sort_key)
+    return (
+        refs == entry['refs']
+        and block['extracted'] == entry['comments']
+        and php_format_flagged(block['flags'], entry) == ('php-format' in block['flags'])
+        and block['fields'].get('msgid_plural') == entry['plural']
+    )
+
+
+def php_format_flagged(old_flags: List[str], entry: dict) -> bool:
+    """Whether the entry should carry php-format (a no-php-format override wins)"""
+    return entry['php_format'] and 'no-php-format' not in old_flags
+
+
+def render_block(entry: dict, old: Optional[dict] = None, fuzzy: bool = False,
+                 nplurals: int = 2) -> str:
+    """
+    Render an entry, carrying translator comments, flags and msgstr from old.
+
+    Flags such as fuzzy or no-php-format are kept; only php-format is
+    recomputed from the msgid.
+    """
+    lines = []
+    if old:
+        lines.extend(old['translator'])
+    lines.extend(f'#. {comment}' for comment in entry['comments'])
+    lines.extend(f'#: {ref}' for ref in entry['refs'])
+
+    old_flags = old['flags'] if old else []
+    flags = [flag for flag in old_flags if flag and flag != 'php-format']
+    if fuzzy and 'fuzzy' not in flags:
+        flags.insert(0, 'fuzzy')
+    if php_format_flagged(old_flags, entry):
+        flags.append('php-format')
+    if flags:
+        lines.append('#, ' + ', '.join(flags))
+
+    if entry['context'] is not None:
+        lines.append(f'msgctxt "{po_escape(entry["context"])}"')
+    lines.append(f'msgid "{po_escape(entry["msgid"])}"')
+
+    old_fields = old['fields'] if old else {}
+    if entry['plural'] is not None:
+        lines.append(f'msgid_plural "{po_escape(entry["plural"])}"')
+        old_forms = [int(name[7:-1]) for name in old_fields if name.startswith('msgstr[')]
+        count = max([nplurals] + [n + 1 for n in old_forms])
+        for n in range(count):
+            lines.append(f'msgstr[{n}] "{po_escape(old_fields.get(f"msgstr[{n}]", ""))}"')
+    else:
+        lines.append(f'msgstr "{po_escape(old_fields.get("msgstr", ""))}"')
+
+    return '\n'.join(lines)
+
+
+def render_obsolete(block: dict) -> str:
+    """Render a removed, translated entry as #~ so the translation isn't lost"""
+    lines = list(block['translator'])
+    for line in block['raw'].split('\n'):
+        if line.startswith('#~'):
+            lines.append(line)
+        elif line.startswith(('msgctxt', 'msgid', 'msgstr', '"')):
+            lines.append('#~ ' + line)
+    return '\n'.join(lines)
+
+
+def update_header_date(header: str, stamp: str) -> str:
+    return re.sub(r'"POT-Creation-Date: [^"\\]*\\n"', f'"POT-Creation-Date: {stamp}\\\\n"', header)
+
+
+def render_new_entry(entry: dict, key: tuple, is_template: bool, obsolete: dict,
+                     current: dict, altered: Dict[tuple, tuple], stats: dict,
+                     nplurals: int) -> str:
+    """Render an entry missing from the catalog file"""
+    if is_template:
+        return render_block(entry, nplurals=nplurals)
+
+    # Revive a previously obsoleted translation, or inherit from the
+    # msgid a codemod altered (fuzzy, like msgmerge)
+    revived = obsolete.pop(key, None)
+    if revived is not None:
+        return render_block(entry, revived, nplurals=nplurals)
+    old_key = altered.get(key)
+    old = current.get(old_key) or obsolete.get(old_key)
+    if old is not None and old['translated']:
+        stats['fuzzy'] += 1
+        return render_block(entry, old, fuzzy=True, nplurals=nplurals)
+    return render_block(entry, nplurals=nplurals)
+
+
+def sync_catalog(path: str, catalog: List[dict], altered: Dict[tuple, tuple],
+                 is_template: bool, stamp: str, dry_run: bool) -> dict:
+    """Update one .pot/.po file in place. Runs in a worker process."""
+    with open(path, 'r', encoding='utf-8') as f:
+        original = f.read()
+
+    preamble, header, blocks = parse_catalog(original)
+    nplurals = plural_count(header)
+    entries = {(e['context'], e['msgid']): e for e in catalog}
+    current = {b['key']: b for b in blocks if not b['obsolete']}
+    obsolete = {b['key']: b for b in blocks if b['obsolete'] and 'msgid' in b['fields']}
+
+    stats = {'kept': 0, 'updated': 0, 'added': 0, 'removed': 0, 'fuzzy': 0}
+    out = []
+    out_keys: List[Optional[tuple]] = []
+    seen = set()
+
+    for block in blocks:
+        if 'msgid' not in block['fields']:
+            out.append(block['raw'])  # Comment-only block, keep as is
+            out_keys.append(None)
+            continue
+        if block['obsolete']:
+            continue
+        entry = entries.get(block['key'])
+        if entry is None:
+            stats['removed'] += 1
+            if not is_template and block['translated']:
+                obsolete[block['key']] = block
+                block['render_obsolete'] = True
+            continue
+        seen.add(block['key'])
+        if block_matches(block, entry):
+            out.append(block['raw'])
+            stats['kept'] += 1
+        else:
+            out.append(render_block(entry, block, nplurals=nplurals))
+            stats['updated'] += 1
+        out_keys.append(block['key'])
+
+    # New entries go right after their nearest preceding neighbour in
+    # source order (or before everything), so the file keeps the order
+    # wp i18n make-pot would produce
+    inserts: Dict[Optional[tuple], List[str]] = {}
+    anchor = None
+    for key, entry in entries.items():
+        if key in seen:
+            anchor = key
+            continue
+        stats['added'] += 1
+        inserts.setdefault(anchor, []).append(
+            render_new_entry(entry, key, is_template, obsolete, current, altered, stats, nplurals)
+        )
+
+    merged = list(inserts.get(None, []))
+    for key, text in zip(out_keys, out):
+        merged.append(text)
+        if key is not None:
+            merged.extend(inserts.get(key, []))
+    out = merged
+
+    if not is_template:
+        out.extend(render_obsolete(b) if b.get('render_obsolete') else b['raw']
+                   for b in obsolete.values())
+
+    entries_changed = stats['updated'] or stats['added'] or stats['removed']
+    if entries_changed:
+        header = update_header_date(header, stamp)
+
+    updated = '\n\n'.join([b for b in preamble + [header] if b] + out) + '\n'
+    stats['changed'] = updated != original
+    stats['path'] = path
+
+    if stats['changed'] and not dry_run:
+        write_atomic(path, updated)
+
+    return stats
+
+
+def write_atomic(path: str, content: str):
+    """Write via a temp file + rename so a crash never leaves a half catalog"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.po')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def find_catalogs() -> List[str]:
+    """The .pot first, then every locale .po"""
+    lang_dir = Path(LANGUAGES_DIR)
+    return [str(lang_dir / POT_FILE)] + [str(p) for p in sorted(lang_dir.glob('*.po'))]
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    dry_run = '--dry-run' in sys.argv
+    full = '--full' in sys.argv
+
+    print("MSH Image Optimizer - Incremental Catalog Sync")
+    print("=" * 70)
+    if dry_run:
+        print("🔍 DRY RUN MODE - No files will be modified\n")
+
+    index = load_index(full)
+    files = find_source_files()
+    changed = changed_files(index, files)
+    deleted = sorted(set(index['files']) - set(files))
+
+    print(f"📁 Source files: {len(files)} ({len(changed)} changed, {len(deleted)} deleted)")
+
+    if not changed and not deleted and not full:
+        print("✅ Catalogs are up to date - nothing to extract")
+        return
+
+    # Re-extract only what changed
+    with ProcessPoolExecutor() as pool:
+        extracted = list(pool.map(extract_file, changed))
+
+    # Flag msgids that changed inside rewritten files
+    altered: Dict[tuple, tuple] = {}
+    flagged = []
+    for rel_path, digest, entries in extracted:
+        cached = index['files'].get(rel_path)
+        source = 'index'
+        old_entries = cached['entries'] if cached else None
+        if old_entries is None:
+            backup = find_codemod_backup(rel_path)
+            if backup is not None:
+                source = backup.name
+                old_entries = extract_php(backup.read_text(encoding='utf-8', errors='replace'))
+
+        if old_entries:
+            removed, added = diff_msgids(old_entries, entries)
+            removed_by_text = {key[1]: key for key in removed}
+            for key in sorted(added, key=lambda k: k[1]):
+                match = difflib.get_close_matches(key[1], list(removed_by_text), n=1, cutoff=0.6)
+                if match:
+                    old_key = removed_by_text.pop(match[0])
+                    altered[key] = old_key
+                    flagged.append((rel_path, source, old_key, key))
+
+        index['files'][rel_path] = {'hash': digest, 'entries': entries}
+
+    for rel_path in deleted:
+        del index['files'][rel_path]
+
+    catalog = build_catalog(index)
+
+    # A removed msgid still referenced elsewhere wasn't altered, just moved
+    altered = {new: old for new, old in altered.items() if old not in catalog}
+    flagged = [f for f in flagged if f[2] not in catalog]
+
+    stamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+    catalog_list = list(catalog.values())
+    catalogs = find_catalogs()
+
+    with ProcessPoolExecutor() as pool:
+        futures = [
+            pool.submit(sync_catalog, path, catalog_list, altered,
+                        path.endswith('.pot'), stamp, dry_run)
+            for path in catalogs
+        ]
+        results = [future.result() for future in futures]
+
+    print(f"📋 Catalog entries: {len(catalog)}\n")
+    for stats in results:
+        name = os.path.basename(stats['path'])
+        state = 'would change' if dry_run else 'updated'
+        if not stats['changed']:
+            print(f"   {name}: unchanged")
+            continue
+        print(f"   {name}: {state} - {stats['kept']} kept, {stats['updated']} rewritten, "
+              f"{stats['added']} added, {stats['removed']} removed"
+              + (f", {stats['fuzzy']} fuzzy" if stats['fuzzy'] else ''))
+
+    if flagged:
+        print(f"\n⚠️  {len(flagged)} msgid(s) altered in rewritten files - review translations:")
+        for rel_path, source, old, new in flagged:
+            print(f"   {rel_path} (vs {source})")
+            print(f"     - {old[1]}")
+            print(f"     + {new[1]}")
+
+    if not dry_run:
+        with open(INDEX_FILE, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        print(f"\n💾 Index saved: {INDEX_FILE}")
+        print("\n📋 Next steps:")
+        print("1. Review changes: git diff msh-image-optimizer/languages/")
+        print("2. Compile: wp i18n make-mo msh-image-optimizer/languages/")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+PHPCS JSON Report Loader
+Indexes a saved phpcs JSON report by file and line for the fix scripts
+
+Lets fix-escaping.py and fix-date-calls.py apply only the fixer that matches
+each reported sniff, at exactly the reported line and column, instead of re-scanning
+every file with their own regexes. The report is a checked-in artifact, so
+no PHP runtime is needed when the fixers run.
+
+Generate the report (uses phpcs.xml.dist):
+    vendor/bin/phpcs --report=json --report-file=phpcs-report.json
+
+Then pass it to a fixer:
+    python3 fix-escaping.py --report=phpcs-report.json --dry-run
+"""
+
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Violations indexed as {relative_path: {line: [(column, sniff_source), ...]}}
+LineViolations = Dict[int, List[Tuple[int, str]]]
+ViolationIndex = Dict[str, LineViolations]
+
+# WordPress-Core sets --tab-width=4, so reported columns count a tab up to
+# the next multiple of 4
+PHPCS_TAB_WIDTH = 4
+
+
+def get_report_arg(argv: Optional[List[str]] = None) -> Optional[str]:
+    """Return the value of --report=<path> from argv, or None if absent"""
+    argv = sys.argv if argv is None else argv
+    for arg in argv:
+        if arg.startswith('--report='):
+            return arg.split('=', 1)[1]
+    return None
+
+
+def normalize_report_path(report_path: str, root: str = '.') -> str:
+    """
+    Map a path from the report onto a path relative to the repo root.
+
+    phpcs writes absolute paths from whichever machine produced the report,
+    so try successively shorter suffixes until one exists under root.
+    Falls back to the path as written if nothing matches.
+    """
+    parts = Path(report_path).parts
+    for i in range(len(parts)):
+        candidate = Path(*parts[i:])
+        if candidate.is_absolute():
+            continue
+        if (Path(root) / candidate).exists():
+            return candidate.as_posix()
+    return Path(report_path).as_posix()
+
+
+def load_report(path: str, sniff_prefixes: Iterable[str] = (), root: str = '.') -> ViolationIndex:
+    """
+    Load a phpcs JSON report and index its messages by file and line.
+
+    Only messages whose source starts with one of sniff_prefixes are kept
+    (all messages if no prefixes are given). Files without matching
+    messages are left out of the index.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+
+    prefixes = tuple(sniff_prefixes)
+    index: ViolationIndex = {}
+
+    for file_path, file_data in report.get('files', {}).items():
+        rel_path = normalize_report_path(file_path, root)
+        for message in file_data.get('messages', []):
+            source = message.get('source', '')
+            line = message.get('line')
+            if line is None:
+                continue
+            if prefixes and not source.startswith(prefixes):
+                continue
+
+            column = int(message.get('column') or 1)
+            locations = index.setdefault(rel_path, {}).setdefault(int(line), [])
+            if (column, source) not in locations:
+                locations.append((column, source))
+
+    return index
+
+
+def count_violations(index: ViolationIndex) -> int:
+    """Count flagged lines across all files in the index"""
+    return sum(len(lines) for lines in index.values())
+
+
+def column_to_offset(text: str, column: int, tab_width: int = PHPCS_TAB_WIDTH) -> int:
+    """Map a 1-based phpcs column (tabs expanded) to a character offset in text"""
+    visual = 1
+    for offset, ch in enumerate(text):
+        if visual >= column:
+            return offset
+        if ch == '\t':
+            visual += tab_width - (visual - 1) % tab_width
+        else:
+            visual += 1
+    return len(text)
+
+
+def apply_line_fixes(content: str, lines: LineViolations,
+                     fixes: List[Tuple[str, str, str]]) -> Tuple[str, int, List[Tuple[int, int, str]]]:
+    """
+    Apply fixes only at the locations flagged in a phpcs report.
+
+    fixes is a list of (sniff_prefix, pattern, replacement) tuples, applied
+    in order. A substitution is made only if its match covers a reported
+    column whose source starts with the fix's sniff_prefix, so a stale
+    report can't rewrite code phpcs never flagged.
+
+    Returns (content, changes, unfixed) where unfixed lists the
+    (line, column, source) locations no fix covered.
+    """
+    content_lines = content.splitlines(keepends=True)
+    changes = 0
+    unfixed = []
+
+    for line_no in sorted(lines):
+        if line_no < 1 or line_no > len(content_lines):
+            print(f"  ⚠️  Line {line_no} out of range - report may be stale")
+            unfixed.extend((line_no, column, source) for column, source in lines[line_no])
+            continue
+
+        text = content_lines[line_no - 1]
+        # Pending locations as [offset, column, source]; offsets track edits
+        pending = [[column_to_offset(text, column), column, source]
+                   for column, source in lines[line_no]]
+
+        for sniff_prefix, pattern, replacement in fixes:
+            targets = [loc for loc in pending if loc[2].startswith(sniff_prefix)]
+            if not targets:
+                continue
+
+            edits = []  # (start, end, new_length)
+
+            def substitute(match):
+                covered = [loc for loc in targets if match.start() <= loc[0] < match.end()]
+                if not covered:
+                    return match.group(0)
+                new_text = match.expand(replacement)
+                edits.append((match.start(), match.end(), len(new_text)))
+                for loc in covered:
+                    pending.remove(loc)
+                    targets.remove(loc)
+                return new_text
+
+            text = re.sub(pattern, substitute, text)
+            changes += len(edits)
+
+            # Shift remaining offsets past each edit by its length change
+            for loc in pending:
+                loc[0] += sum(length - (end - start) for start, end, length in edits if end <= loc[0])
+
+        content_lines[line_no - 1] = text
+
+        for _, column, source in pending:
+            print(f"  ⚠️  Line {line_no}:{column} no fix matches {source} - report may be stale")
+            unfixed.append((line_no, column, source))
+
+    return ''.join(content_lines), changes, unfixed
+
+
+if __name__ == '__main__':
+    report_file = get_report_arg() or (sys.argv[1] if len(sys.argv) > 1 else None)
+    if not report_file or not os.path.exists(report_file):
+        print("Usage: python3 phpcs_report.py <phpcs-report.json>")
+        sys.exit(1)
+
+    violations = load_report(report_file)
+    by_source: Dict[str, int] = {}
+    for file_lines in violations.values():
+        for sources in file_lines.values():
+            for _, source in sources:
+                by_source[source] = by_source.get(source, 0) + 1
+
+    print(f"Files with violations: {len(violations)}")
+    print(f"Flagged lines: {count_violations(violations)}")
+    for source, count in sorted(by_source.items(), key=lambda x: -x[1])[:20]:
+        print(f"  {count:5d}  {source}")
@@ -0,0 +1,113 @@
+"""
+Tests for i18n-catalog-sync.py catalog rewriting
+
+Run: python3 -m pytest tests/test_i18n_catalog_sync.py
+"""
+
+import importlib.util
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / 'i18n-catalog-sync.py'
+spec = importlib.util.spec_from_file_location('i18n_catalog_sync', SCRIPT)
+sync = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sync)
+
+STAMP = '2026-01-01T00:00:00+00:00'
+
+HEADER = '''msgid ""
+msgstr ""
+"Language: de_DE\\n"
+"POT-Creation-Date: 2025-10-17T23:58:28+00:00\\n"
+'''
+
+
+def entry(msgid, *refs):
+    return {
+        'context': None,
+        'msgid': msgid,
+        'plural': None,
+        'refs': list(refs),
+        'comments': [],
+        'php_format': False,
+    }
+
+
+class SyncCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.po')
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def write(self, content):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def read(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def run_sync(self, catalog, altered=None):
+        return sync.sync_catalog(self.path, catalog, altered or {}, False, STAMP, False)
+
+    def test_fuzzy_flag_survives_a_later_rewrite(self):
+        self.write(HEADER + '''
+#: admin/a.php:10
+msgid "Healthy"
+msgstr "Gesund"
+''')
+
+        # Codemod altered the msgid: old translation carried over as fuzzy
+        self.run_sync([entry('Healthy!', 'admin/a.php:10')],
+                      {(None, 'Healthy!'): (None, 'Healthy')})
+        self.assertIn('#, fuzzy\nmsgid "Healthy!"\nmsgstr "Gesund"', self.read())
+
+        # A line shift rewrites the entry; it must stay fuzzy
+        self.run_sync([entry('Healthy!', 'admin/a.php:11')])
+        content = self.read()
+        self.assertIn('#: admin/a.php:11\n#, fuzzy\nmsgid "Healthy!"\nmsgstr "Gesund"', content)
+
+        # And an unchanged run leaves the file alone
+        stats = self.run_sync([entry('Healthy!', 'admin/a.php:11')])
+        self.assertFalse(stats['changed'])
+
+    def test_translator_flags_are_kept(self):
+        self.write(HEADER + '''
+#: admin/a.php:10
+#, fuzzy, no-php-format
+msgid "100% done"
+msgstr "100% fertig"
+''')
+        item = entry('100% done', 'admin/a.php:12')
+        item['php_format'] = True
+        self.run_sync([item])
+        self.assertIn('#, fuzzy, no-php-format\nmsgid "100% done"', self.read())
+
+    def test_new_entries_are_placed_in_source_order(self):
+        self.write(HEADER + '''
+#: admin/a.php:10
+msgid "First"
+msgstr ""
+
+#: admin/a.php:30
+msgid "Third"
+msgstr ""
+''')
+        self.run_sync([
+            entry('Zeroth', 'admin/a.php:5'),
+            entry('First', 'admin/a.php:10'),
+            entry('Second', 'admin/a.php:20'),
+            entry('Third', 'admin/a.php:30'),
+        ])
+        content = self.read()
+        positions = [content.index(f'msgid "{m}"') for m in ('Zeroth', 'First', 'Second', 'Third')]
+        self.assertEqual(positions, sorted(positions))
+
+
+if __name__ == '__main__':
+    unittest.main()